@@ -0,0 +1,180 @@
+"""
+여행 트렌드 앱 공용 기능 모음 (AI, 검색, 데이터)
+
+Streamlit은 app.py를 매 rerun마다 다시 실행하지만, import된 모듈은
+프로세스당 한 번만 로드되므로 상수/캐시 함수는 여기에 둔다.
+"""
+import streamlit as st
+import pandas as pd
+from duckduckgo_search import DDGS
+import os
+import google.generativeai as genai
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Gemini 프롬프트/응답 길이 상한 (입력 토큰 절약 + 응답 시간 단축)
+MAX_PROMPT_CHARS = 4000
+# gemini-flash-latest는 thinking 모델이라 생각(thinking) 토큰도 이 상한에 포함됨.
+# 답변 자체는 4~5줄(수백 토큰)이지만 400처럼 낮게 잡으면 생각에 다 써버려
+# 답이 잘리거나 텍스트 없이 끝나므로, 답변 + 생각을 넉넉히 담을 값으로 설정
+MAX_OUTPUT_TOKENS = 4096
+
+# 같은 (도시, 검색 결과) 분석은 30분 동안 재사용
+ANALYSIS_TTL = 1800
+ANALYSIS_MAX_ENTRIES = 128
+AI_ERROR_MESSAGE = "죄송합니다. AI 분석 중 오류가 발생했습니다."
+
+# DuckDuckGo 요청 타임아웃 / 화면에서 기다리는 최대 시간 (초)
+DDG_TIMEOUT = 10
+DDG_WAIT_TIMEOUT = 12
+
+@st.cache_resource(show_spinner=False)
+def _build_gemini_model(api_key: str):
+    """API 키별 Gemini 모델 (키가 같으면 프로세스당 한 번만 생성)"""
+    genai.configure(api_key=api_key)
+    # ✅ 성공한 모델: gemini-flash-latest
+    return genai.GenerativeModel("gemini-flash-latest")
+
+def get_gemini_model():
+    """Gemini API 키 설정 및 모델 준비 (키는 매번 확인, 실패는 캐시하지 않음)"""
+    try:
+        api_key = st.secrets.get("GEMINI_API_KEY")
+        if not api_key:
+            return None
+        return _build_gemini_model(api_key)
+    except Exception:
+        return None
+
+def analyze_with_gemini(model, city_name: str, content_text: str):
+    """Gemini AI(Flash Latest)로 여행 도시 분석 - 텍스트 추출 버전"""
+    try:
+        prompt = f"""
+        다음은 '{city_name}'에 대한 최신 여행 검색 정보입니다:
+        {content_text[:MAX_PROMPT_CHARS]}
+        
+        위 정보를 바탕으로 다음을 수행해줘:
+        1. 이 도시가 지금 인기 있는 이유를 3줄로 요약.
+        2. 여행객 성향(커플, 가족, 혼자 등)에 따른 추천 멘트 한 줄.
+        3. 말투는 친절한 여행 가이드처럼 해줘.
+        """
+        
+        # 스트리밍 요청
+        response = model.generate_content(
+            prompt,
+            stream=True,
+            generation_config={"max_output_tokens": MAX_OUTPUT_TOKENS},
+        )
+        
+        # 🚨 여기가 핵심 수정! 
+        # 상자(Response)를 뜯어서 내용물(Text)만 한 조각씩 화면에 던져줍니다.
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+                
+    except Exception as e:
+        # 에러가 나면 여기서 잡힙니다.
+        # st.error(f"AI 호출 중 오류: {e}") # 필요하면 주석 해제
+        yield f"{AI_ERROR_MESSAGE} ({e})"
+
+# 분석 캐시는 모든 세션 스레드가 공유하므로 읽기/쓰기/정리를 잠금으로 보호
+_analysis_lock = threading.Lock()
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_cache() -> dict:
+    """AI 분석 결과 캐시 {(도시, 텍스트 해시): (저장 시각, 결과)} - 저장 순서 유지"""
+    return {}
+
+def get_cached_analysis(city_name: str, text_hash: str):
+    """TTL 안에 저장된 분석 결과가 있으면 반환, 없으면 None"""
+    with _analysis_lock:
+        entry = get_analysis_cache().get((city_name, text_hash))
+    if entry and time.time() - entry[0] < ANALYSIS_TTL:
+        return entry[1]
+    return None
+
+def save_analysis(city_name: str, text_hash: str, result: str):
+    """정상 응답만 저장 (오류 메시지는 캐시하지 않음)"""
+    if not result or AI_ERROR_MESSAGE in result:
+        return
+    key = (city_name, text_hash)
+    now = time.time()
+    with _analysis_lock:
+        cache = get_analysis_cache()
+        # 만료된 항목 정리
+        for k in [k for k, (saved_at, _) in cache.items() if now - saved_at >= ANALYSIS_TTL]:
+            del cache[k]
+        # 같은 키는 맨 뒤(최신)로 다시 넣고, 개수 상한을 넘으면 가장 오래된 것부터 삭제
+        cache.pop(key, None)
+        cache[key] = (now, result)
+        while len(cache) > ANALYSIS_MAX_ENTRIES:
+            del cache[next(iter(cache))]
+
+@st.cache_resource(show_spinner=False)
+def get_ddgs() -> DDGS:
+    """DuckDuckGo 검색 세션 (프로세스당 하나를 만들어 재사용)"""
+    return DDGS(timeout=DDG_TIMEOUT)
+
+@st.cache_resource(show_spinner=False)
+def _read_local_image(path: str) -> bytes:
+    """로컬 이미지 바이트 읽기 (경로별로 프로세스당 한 번만 읽음)"""
+    with open(path, "rb") as f:
+        return f.read()
+
+def load_local_image(path: str):
+    """로컬 이미지 바이트 로드 (파일 유무는 매번 확인, 없는 파일은 캐시하지 않음)"""
+    if not os.path.exists(path):
+        return None
+    return _read_local_image(path)
+
+def generate_mock_data(city_name: str, n: int = 5) -> pd.DataFrame:
+    """검색 실패 시 보여줄 가짜 데이터"""
+    mock_data = [
+        {"제목": f"{city_name} 3박 4일 완벽 코스", "요약": "현지인이 추천하는 알짜배기 코스 모음입니다.", "링크": "#"},
+        {"제목": f"{city_name} 맛집 BEST 5", "요약": "줄 서서 먹는다는 그곳, 솔직 후기!", "링크": "#"},
+        {"제목": f"{city_name} 숙소 추천", "요약": "가성비와 위치 모두 잡은 호텔 리스트.", "링크": "#"},
+        {"제목": f"실시간 {city_name} 날씨와 옷차림", "요약": "지금 여행하기 딱 좋은 날씨네요.", "링크": "#"},
+        {"제목": f"{city_name} 쇼핑 리스트", "요약": "이건 꼭 사야 해! 필수 기념품 정리.", "링크": "#"},
+    ]
+    return pd.DataFrame(mock_data[:n])
+
+# 같은 도시는 1시간 동안 캐시된 결과 재사용 (위젯 변경 시 재검색 방지)
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def fetch_ddg_results(city_name: str, max_results: int = 10) -> pd.DataFrame:
+    """DuckDuckGo 검색 (실패/빈 결과는 예외로 알려서 캐시되지 않게 함)"""
+    query = f"{city_name} 여행 추천 코스 맛집"
+    # 컬럼별 리스트로 바로 모음 (행마다 dict 만들지 않음)
+    titles, bodies, hrefs = [], [], []
+    # 검색 시도 (캐시된 세션 재사용)
+    ddgs = get_ddgs()
+    for r in ddgs.text(query, max_results=max_results, region="kr-kr"):
+        href = r.get("href") or ""
+        if not href:
+            continue
+        titles.append(r.get("title") or "")
+        bodies.append(r.get("body") or "")
+        hrefs.append(href)
+
+    if not hrefs:
+        raise ValueError(f"'{city_name}' 검색 결과가 없습니다.")
+
+    return pd.DataFrame({"제목": titles, "요약": bodies, "링크": hrefs})
+
+def start_search(city_name: str, max_results: int = 10) -> Future:
+    """DuckDuckGo 검색을 백그라운드 스레드에서 바로 시작 (검색마다 전용 스레드)"""
+    # 공용 풀을 쓰지 않으므로 대기열 시간 없이 바로 실행되고,
+    # 멈춘 요청도 다른 세션의 검색을 막지 않음 (각 요청은 DDG_TIMEOUT으로 제한)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ddg")
+    future = executor.submit(fetch_ddg_results, city_name, max_results)
+    executor.shutdown(wait=False)
+    return future
+
+def wait_search(future: Future, city_name: str) -> tuple[pd.DataFrame, bool]:
+    """시작된 검색 결과 받기 (실패/시간 초과 시 Mock Data 반환)"""
+    try:
+        return future.result(timeout=DDG_WAIT_TIMEOUT), True
+
+    except Exception as e:
+        # 검색 에러 또는 시간 초과 발생 시
+        # print(f"검색 에러: {e}") # 디버깅용
+        return generate_mock_data(city_name), False